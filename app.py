@@ -1,15 +1,28 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, abort
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, abort, Response, stream_with_context, g
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, case, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import selectinload, contains_eager, load_only, joinedload, lazyload
+from sqlalchemy.ext.hybrid import hybrid_property
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_wtf.csrf import CSRFProtect
+from flask.json.provider import DefaultJSONProvider
+from jinja2 import FileSystemBytecodeCache
+import orjson
 from datetime import datetime, date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import calendar
+import functools
 import os
 import json
+import time
 import csv
 from io import StringIO, BytesIO
-import qrcode
+from itertools import islice
+import segno
 import secrets
+import sqlite3
 import base64
 import string
 import hmac
@@ -72,9 +85,95 @@ def ensure_sqlite_directory(database_uri: str) -> None:
 
 ensure_sqlite_directory(app.config['SQLALCHEMY_DATABASE_URI'])
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson.
+
+    jsonify-heavy endpoints (bill details, payment lists, session polls)
+    encode noticeably faster than with the stdlib encoder; self.default
+    still covers the non-native types Flask normally handles.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=kwargs.get('default', self.default),
+                            option=orjson.OPT_SORT_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            # The session serializer passes object_hook, which orjson
+            # doesn't support — let the stdlib path handle those calls
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+app.json = OrjsonProvider(app)
+
+# Persist compiled Jinja template bytecode so the calendar/dashboard templates
+# don't have to be recompiled after every worker restart
+jinja_cache_dir = os.path.join(app.instance_path, 'jinja_cache')
+os.makedirs(jinja_cache_dir, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir)
+
+# On-disk cache of per-student QR PNGs (see generate_qr)
+qr_cache_dir = os.path.join(app.instance_path, 'qr_cache')
+os.makedirs(qr_cache_dir, exist_ok=True)
+
+def _student_qr_path(student_id):
+    return os.path.join(qr_cache_dir, f'{student_id}.png')
+
+def _qr_token(student_id):
+    """Compact signed payload for student QR codes.
+
+    '<id>.<hmac>' is a fraction of the old JSON blob, which keeps the QR
+    at a low version (fewer modules to render and scan) while the HMAC
+    stops anyone from minting a code for an arbitrary student id.
+    """
+    sig = hmac.new(app.secret_key.encode(), str(student_id).encode(),
+                   hashlib.sha256).hexdigest()[:16]
+    return f"{student_id}.{sig}"
+
+def _verify_qr_token(token):
+    """Return the student id for a valid token, else None."""
+    student_id, _, sig = str(token).partition('.')
+    if not student_id.isdigit():
+        return None
+    expected = hmac.new(app.secret_key.encode(), student_id.encode(),
+                        hashlib.sha256).hexdigest()[:16]
+    return int(student_id) if hmac.compare_digest(sig, expected) else None
+
+def _render_student_qr(student_id):
+    """Write the student's QR PNG to the disk cache if missing; return its path.
+
+    Encodes the compact signed token rather than a JSON blob: the short
+    payload keeps the QR at a low version, and medium error correction is
+    plenty for a phone-screen scan. Writes atomically (tmp + rename) so a
+    concurrent reader never sees a half-written PNG. Pure CPU + filesystem,
+    so it is safe to run off the request thread.
+    """
+    cache_path = _student_qr_path(student_id)
+    if not os.path.exists(cache_path):
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        segno.make(_qr_token(student_id), error='m').save(tmp_path, kind='png', scale=10, border=4)
+        os.replace(tmp_path, cache_path)
+    return cache_path
+
 # Initialize extensions
 db = SQLAlchemy(app)
 login_manager = LoginManager(app)
+
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite for concurrent web traffic; no-op on other backends.
+
+    WAL lets readers proceed during writes, synchronous=NORMAL drops the
+    per-commit fsync that dominates attendance/billing write latency.
+    """
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.close()
 login_manager.login_view = 'login'
 csrf = CSRFProtect(app)
 
@@ -98,12 +197,22 @@ class Settings(db.Model):
     key = db.Column(db.String(50), unique=True, nullable=False)
     value = db.Column(db.String(255), nullable=False)
     description = db.Column(db.String(255))
-    
+
+    # The settings table is tiny but read on almost every request; cache
+    # values in-process with a short TTL so hot pages skip the SELECT
+    _cache = {}
+    _CACHE_TTL = 60  # seconds
+
     @staticmethod
     def get_value(key, default=None):
+        cached = Settings._cache.get(key)
+        if cached and time.monotonic() - cached[1] < Settings._CACHE_TTL:
+            return cached[0] if cached[0] is not None else default
         setting = Settings.query.filter_by(key=key).first()
-        return setting.value if setting else default
-    
+        value = setting.value if setting else None
+        Settings._cache[key] = (value, time.monotonic())
+        return value if value is not None else default
+
     @staticmethod
     def set_value(key, value, description=None):
         setting = Settings.query.filter_by(key=key).first()
@@ -115,6 +224,7 @@ class Settings(db.Model):
             setting = Settings(key=key, value=str(value), description=description)
             db.session.add(setting)
         db.session.commit()
+        Settings._cache.pop(key, None)
 
 class Student(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -130,6 +240,10 @@ class Student(db.Model):
     attendance = db.relationship('Attendance', backref='student', lazy=True, cascade='all, delete-orphan')
     bills = db.relationship('Bill', backref='student', lazy=True, cascade='all, delete-orphan')
     payments = db.relationship('Payment', backref='student', lazy=True, cascade='all, delete-orphan')
+    # Serves the mess-scoped, name-ordered student lists
+    __table_args__ = (
+        db.Index('ix_student_mess_name', 'mess_id', 'name'),
+    )
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -144,21 +258,36 @@ class Attendance(db.Model):
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     date = db.Column(db.Date, nullable=False, default=date.today)
     meal_type = db.Column(db.String(10), nullable=False)  # 'lunch' or 'dinner'
-    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    # server_default lets fresh schemas stamp rows in the DB; the Python
+    # default stays as a fallback for pre-existing databases whose tables
+    # were created without the DEFAULT clause
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.now, server_default=db.func.now())
     method = db.Column(db.String(10), default='manual')  # 'manual' or 'qr'
     marked_by = db.Column(db.String(50), nullable=False)
     session_id = db.Column(db.Integer, db.ForeignKey('attendance_session.id'), nullable=True)
-    
+    # Composite indexes for the per-student date-range scans used on every
+    # dashboard/billing render. The unique index also enforces at the DB
+    # level what the duplicate checks guard in application code, and its
+    # (student_id, date) prefix serves the date-range scans.
+    __table_args__ = (
+        db.Index('ix_attendance_student_date_meal', 'student_id', 'date', 'meal_type', unique=True),
+        db.Index('ix_attendance_session_meal', 'session_id', 'meal_type'),
+        db.Index('ix_attendance_date_meal', 'date', 'meal_type'),
+    )
+
+
     def to_dict(self):
+        # isoformat() is implemented in C and much cheaper than strftime
+        # when serializing long attendance lists
         return {
             'id': self.id,
             'student': {
                 'id': self.student.id,
                 'name': self.student.name
             },
-            'date': self.date.strftime('%Y-%m-%d'),
+            'date': self.date.isoformat(),
             'meal_type': self.meal_type,
-            'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'timestamp': self.timestamp.isoformat(sep=' ', timespec='seconds'),
             'method': self.method,
             'marked_by': self.marked_by
         }
@@ -169,26 +298,38 @@ class AttendanceSession(db.Model):
     date = db.Column(db.Date, nullable=False, default=date.today)
     meal_type = db.Column(db.String(10), nullable=False)
     created_by = db.Column(db.String(50), nullable=False)
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now, server_default=db.func.now())
     expires_at = db.Column(db.DateTime, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     mess_id = db.Column(db.Integer, db.ForeignKey('mess.id'), nullable=True)  # Scope session to a mess
     attendances = db.relationship('Attendance', backref='session', lazy=True)
-    
+    # Counted in SQL when the session row is loaded, so to_dict doesn't have
+    # to pull in the whole attendance collection just to len() it
+    attendance_count = db.column_property(
+        db.select(func.count(Attendance.id))
+        .where(Attendance.session_id == id)
+        .correlate_except(Attendance)
+        .scalar_subquery()
+    )
+    # Serves the active-sessions poll (mess + today + active)
+    __table_args__ = (
+        db.Index('ix_session_mess_date_active', 'mess_id', 'date', 'is_active'),
+    )
+
     def is_valid(self):
         return self.is_active and datetime.now() < self.expires_at
-    
+
     def to_dict(self):
         return {
             'id': self.id,
             'token': self.token,
-            'date': self.date.strftime('%Y-%m-%d'),
+            'date': self.date.isoformat(),
             'meal_type': self.meal_type,
             'created_by': self.created_by,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'expires_at': self.expires_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'created_at': self.created_at.isoformat(sep=' ', timespec='seconds'),
+            'expires_at': self.expires_at.isoformat(sep=' ', timespec='seconds'),
             'is_active': self.is_active,
-            'attendance_count': len(self.attendances)
+            'attendance_count': self.attendance_count
         }
 
 class Bill(db.Model):
@@ -202,15 +343,29 @@ class Bill(db.Model):
     daily_rate = db.Column(db.Float, nullable=False, default=100.0)
     generated_on = db.Column(db.DateTime, default=datetime.utcnow)
     mess_id = db.Column(db.Integer, db.ForeignKey('mess.id'), nullable=True)  # Scope bill to mess
-    payments = db.relationship('Payment', backref='bill', lazy=True, cascade='all, delete-orphan')
+    # Almost every consumer of a Bill reads payment_status/latest_payment,
+    # so batch-load payments with the bills instead of one SELECT per bill.
+    # Newest-first ordering comes from the index, sparing callers a Python
+    # re-sort (SQLite sorts NULL created_at last under DESC).
+    payments = db.relationship('Payment', backref='bill', lazy='selectin',
+                               order_by='Payment.created_at.desc()',
+                               cascade='all, delete-orphan')
+    __table_args__ = (
+        db.Index('ix_bill_student_year_month', 'student_id', 'year', 'month'),
+    )
 
     @property
     def latest_payment(self):
-        if not self.payments:
-            return None
-        return max(self.payments, key=lambda payment: payment.created_at or datetime.min)
-
-    @property
+        if 'payments' in self.__dict__:
+            # Collection already loaded (selectin) — pick from memory
+            if not self.payments:
+                return None
+            return max(self.payments, key=lambda payment: payment.created_at or datetime.min)
+        # Otherwise fetch just the newest row via ix_payment_bill_created
+        # instead of materializing the whole collection
+        return Payment.query.filter_by(bill_id=self.id).order_by(Payment.created_at.desc()).first()
+
+    @hybrid_property
     def payment_status(self):
         if self.paid:
             return 'paid'
@@ -220,6 +375,21 @@ class Bill(db.Model):
             return 'rejected'
         return 'pending'
 
+    @payment_status.expression
+    def payment_status(cls):
+        # SQL form of the property: scalar EXISTS subqueries instead of
+        # loading the payments collection just to compute a status
+        has_submitted = db.select(Payment.id).where(
+            Payment.bill_id == cls.id, Payment.status == 'submitted').exists()
+        has_rejected = db.select(Payment.id).where(
+            Payment.bill_id == cls.id, Payment.status == 'rejected').exists()
+        return case(
+            (cls.paid, 'paid'),
+            (has_submitted, 'pending_verification'),
+            (has_rejected, 'rejected'),
+            else_='pending'
+        )
+
 
 class Payment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -235,6 +405,11 @@ class Payment(db.Model):
     verified_at = db.Column(db.DateTime, nullable=True)
     verified_by = db.Column(db.String(80), nullable=True)
     mess_id = db.Column(db.Integer, db.ForeignKey('mess.id'), nullable=True)  # Scope payment to mess (redundant but helpful for reporting)
+    __table_args__ = (
+        db.Index('ix_payment_student_status', 'student_id', 'status'),
+        db.Index('ix_payment_bill_created', 'bill_id', 'created_at'),
+        db.Index('ix_payment_bill_status', 'bill_id', 'status'),
+    )
 
     def to_dict(self):
         return {
@@ -273,28 +448,75 @@ class Mess(db.Model):
         return f"<Mess {self.name}>"
 
 def current_mess():
-    if current_user.is_authenticated and getattr(current_user, 'mess_id', None):
-        return Mess.query.get(current_user.mess_id)
-    return None
+    # Memoized on g: get_effective_upi() and get_effective_daily_rate() both
+    # call this, which would otherwise mean two Mess fetches per request
+    if not hasattr(g, '_mess'):
+        if current_user.is_authenticated and getattr(current_user, 'mess_id', None):
+            g._mess = db.session.get(Mess, current_user.mess_id)
+        else:
+            g._mess = None
+    return g._mess
 
 def get_effective_upi():
-    """Return (upi_id, upi_name) preferring current mess, then Settings, then app.config."""
-    mess = current_mess()
+    """Return (upi_id, upi_name) preferring current mess, then Settings, then app.config.
+
+    Memoized on g like current_mess(), so repeat calls within one request
+    (route + template) resolve once.
+    """
+    if not hasattr(g, '_effective_upi'):
+        mess = current_mess()
+        if mess and (mess.upi_id or mess.upi_name):
+            g._effective_upi = (mess.upi_id or app.config.get('UPI_ID'),
+                                mess.upi_name or app.config.get('UPI_NAME'))
+        else:
+            # Fallback to Settings for backward-compat
+            g._effective_upi = (Settings.get_value('upi_id', app.config.get('UPI_ID')),
+                                Settings.get_value('upi_name', app.config.get('UPI_NAME')))
+    return g._effective_upi
+
+# Static, pre-encoded part of the UPI transaction note
+_QUOTED_NOTE_PREFIX = quote("Mess Bill #")
+
+@functools.lru_cache(maxsize=32)
+def _upi_params(mess_id):
+    """Effective (upi_id, payee_name) for a mess, resolved once per settings change.
+
+    Mess preferences win, then Settings, then app.config — same order as
+    get_effective_upi(), but cached per mess so QR generation skips the
+    Settings lookups. Cleared whenever admin settings are saved.
+    """
+    mess = db.session.get(Mess, mess_id) if mess_id else None
     if mess and (mess.upi_id or mess.upi_name):
-        return mess.upi_id or app.config.get('UPI_ID'), mess.upi_name or app.config.get('UPI_NAME')
-    # Fallback to Settings for backward-compat
-    upi_id = Settings.get_value('upi_id', app.config.get('UPI_ID'))
-    upi_name = Settings.get_value('upi_name', app.config.get('UPI_NAME'))
-    return upi_id, upi_name
+        upi_id = mess.upi_id or app.config.get('UPI_ID')
+        upi_name = mess.upi_name or app.config.get('UPI_NAME')
+    else:
+        upi_id = Settings.get_value('upi_id', app.config.get('UPI_ID'))
+        upi_name = Settings.get_value('upi_name', app.config.get('UPI_NAME'))
+    return (upi_id or app.config.get('UPI_ID', 'merchant@upi'),
+            upi_name or app.config.get('UPI_NAME', 'Mess Management'))
+
+@functools.lru_cache(maxsize=32)
+def _upi_link_prefix(upi_id, upi_name):
+    """Pre-quoted static part of the UPI deep link for a (upi_id, payee) pair.
+
+    Only amount/note/reference vary per request, so there is no point
+    percent-encoding the payee name on every QR generation.
+    """
+    return f"upi://pay?pa={upi_id}&pn={quote(upi_name)}"
 
 def get_effective_daily_rate():
+    if hasattr(g, '_effective_daily_rate'):
+        return g._effective_daily_rate
     mess = current_mess()
     if mess and mess.daily_meal_rate:
-        return float(mess.daily_meal_rate)
-    try:
-        return float(Settings.get_value('daily_meal_rate', '100.0'))
-    except Exception:
-        return 100.0
+        rate = float(mess.daily_meal_rate)
+    else:
+        try:
+            rate = float(Settings.get_value('daily_meal_rate', '100.0'))
+        except Exception:
+            rate = 100.0
+    g._effective_daily_rate = rate
+    return rate
 
 
 def error_response(message, status_code=400):
@@ -307,13 +529,27 @@ def get_current_meal_type():
     current_hour = datetime.now().hour
     return 'dinner' if current_hour >= 15 else 'lunch'
 
+# Alphanumeric alphabet with ambiguous chars (0/O, 1/l/I) filtered out,
+# built once at import time
+_TEMP_PASSWORD_ALPHABET = ''.join(
+    ch for ch in string.ascii_letters + string.digits if ch not in set('0O1lI'))
+
 def generate_temp_password(length: int = 10) -> str:
     """Generate a secure temporary password (alphanumeric, avoiding ambiguous chars)."""
-    alphabet = string.ascii_letters + string.digits
-    # Optionally avoid ambiguous chars (0/O, 1/l/I) by filtering
-    ambiguous = set('0O1lI')
-    candidates = ''.join(ch for ch in alphabet if ch not in ambiguous)
-    return ''.join(secrets.choice(candidates) for _ in range(max(6, length)))
+    length = max(6, length)
+    alphabet = _TEMP_PASSWORD_ALPHABET
+    # Draw a pool of random bytes in one os.urandom call instead of one
+    # CSPRNG round-trip per character; mask + reject keeps it unbiased
+    mask = (1 << (len(alphabet) - 1).bit_length()) - 1
+    chars = []
+    while len(chars) < length:
+        for byte in os.urandom(length * 2):
+            index = byte & mask
+            if index < len(alphabet):
+                chars.append(alphabet[index])
+                if len(chars) == length:
+                    break
+    return ''.join(chars)
 
 def get_date_range(range_type, start_date=None, end_date=None):
     """Get date range based on filter type"""
@@ -341,7 +577,9 @@ def get_date_range(range_type, start_date=None, end_date=None):
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # db.session.get hits the identity map directly (Query.get is the
+    # legacy spelling and always goes through query machinery)
+    return db.session.get(User, int(user_id))
 
 # Authentication Routes
 @app.route('/')
@@ -466,10 +704,12 @@ def student_login():
             session['student_name'] = student.name
             session.permanent = True  # Make session persist across browser restarts
             
-            # Check for pending notifications
+            # Check for pending notifications (both payment counts in one query)
             pending_bills = Bill.query.filter_by(student_id=student.id, paid=False).count()
-            pending_payments = Payment.query.filter_by(student_id=student.id, status='submitted').count()
-            rejected_payments = Payment.query.filter_by(student_id=student.id, status='rejected').count()
+            pending_payments, rejected_payments = db.session.query(
+                func.coalesce(func.sum(case((Payment.status == 'submitted', 1), else_=0)), 0),
+                func.coalesce(func.sum(case((Payment.status == 'rejected', 1), else_=0)), 0)
+            ).filter(Payment.student_id == student.id).one()
             
             # Show welcome message with notifications
             if rejected_payments > 0:
@@ -507,23 +747,41 @@ def student_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def current_student():
+    """Return the logged-in Student, cached on flask.g for this request.
+
+    Several helpers/views need the student row; caching it on g means the
+    ORM load happens at most once per request (db.session.get also hits
+    the identity map instead of always round-tripping).
+    """
+    from flask import session, g
+    if not hasattr(g, '_student'):
+        g._student = db.session.get(Student, session['student_id'])
+    return g._student
+
 @app.route('/student/dashboard')
 @student_required
 def student_dashboard():
     from flask import session
-    student = Student.query.get(session['student_id'])
+    student = current_student()
     
     # Get current month stats
     today = date.today()
     start_of_month = today.replace(day=1)
     
-    # Total attendance this month
-    monthly_attendance = Attendance.query.filter(
+    # Monthly totals in one aggregate query; the dashboard only shows the
+    # counts, so there is no need to materialize the attendance rows
+    total_attendance, lunch_count, dinner_count = db.session.query(
+        func.count(),
+        func.coalesce(func.sum(case((Attendance.meal_type == 'lunch', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Attendance.meal_type == 'dinner', 1), else_=0)), 0)
+    ).filter(
         Attendance.student_id == student.id,
         Attendance.date >= start_of_month,
         Attendance.date <= today
-    ).all()
-    
+    ).one()
+
+
     # Today's attendance
     today_attendance = Attendance.query.filter(
         Attendance.student_id == student.id,
@@ -549,13 +807,9 @@ def student_dashboard():
         Attendance.date <= today
     ).order_by(Attendance.date.desc()).all()
     
-    # Meal type breakdown this month
-    lunch_count = sum(1 for a in monthly_attendance if a.meal_type == 'lunch')
-    dinner_count = sum(1 for a in monthly_attendance if a.meal_type == 'dinner')
-    
     return render_template('student_dashboard.html',
                          student=student,
-                         total_attendance=len(monthly_attendance),
+                         total_attendance=total_attendance,
                          lunch_count=lunch_count,
                          dinner_count=dinner_count,
                          today_attendance=today_attendance,
@@ -564,12 +818,16 @@ def student_dashboard():
                          recent_payments=recent_payments,
                          recent_meals=recent_meals)
 
+@functools.lru_cache(maxsize=64)
+def _month_grid(year, month):
+    """Cache the calendar grid per (year, month); it's pure-functional."""
+    return calendar.monthcalendar(year, month)
+
 @app.route('/student/attendance')
 @student_required
 def student_attendance():
     from flask import session
-    import calendar
-    student = Student.query.get(session['student_id'])
+    student = current_student()
     
     # Get view type (calendar or list)
     view_type = request.args.get('view', 'calendar')
@@ -600,12 +858,10 @@ def student_attendance():
         next_month, next_year = calendar_month + 1, calendar_year
     
     # Get month name
-    month_names = ['', 'January', 'February', 'March', 'April', 'May', 'June',
-                   'July', 'August', 'September', 'October', 'November', 'December']
-    calendar_month_name = month_names[calendar_month]
-    
+    calendar_month_name = calendar.month_name[calendar_month]
+
     # Build calendar data
-    cal = calendar.monthcalendar(calendar_year, calendar_month)
+    cal = _month_grid(calendar_year, calendar_month)
     
     # Get all attendance for the month
     first_day = date(calendar_year, calendar_month, 1)
@@ -614,38 +870,30 @@ def student_attendance():
     else:
         last_day = date(calendar_year, calendar_month + 1, 1) - timedelta(days=1)
     
-    month_attendance = Attendance.query.filter(
+    # Only date and meal_type are needed for the calendar grid, so fetch
+    # plain tuples instead of hydrating full Attendance objects
+    month_attendance = db.session.query(Attendance.date, Attendance.meal_type).filter(
         Attendance.student_id == student.id,
         Attendance.date >= first_day,
         Attendance.date <= last_day
     ).all()
-    
+
     # Create a dictionary of attendance by date
     attendance_by_date = {}
-    for att in month_attendance:
-        if att.date not in attendance_by_date:
-            attendance_by_date[att.date] = {'lunch': False, 'dinner': False}
-        attendance_by_date[att.date][att.meal_type] = True
-    
-    # Build calendar days array
-    calendar_days = []
-    for week in cal:
-        for day in week:
-            if day == 0:
-                calendar_days.append({'empty': True})
-            else:
-                day_date = date(calendar_year, calendar_month, day)
-                is_future = day_date > today
-                has_lunch = attendance_by_date.get(day_date, {}).get('lunch', False)
-                has_dinner = attendance_by_date.get(day_date, {}).get('dinner', False)
-                
-                calendar_days.append({
-                    'empty': False,
-                    'day': day,
-                    'is_future': is_future,
-                    'has_lunch': has_lunch,
-                    'has_dinner': has_dinner
-                })
+    for att_date, att_meal in month_attendance:
+        attendance_by_date.setdefault(att_date, {'lunch': False, 'dinner': False})[att_meal] = True
+    
+    # Build a flat list of (day, is_future, has_lunch, has_dinner) tuples;
+    # day 0 marks the empty padding cells. Tuples avoid allocating up to 42
+    # small dicts per render (the template unpacks them directly).
+    def day_cell(day):
+        day_date = date(calendar_year, calendar_month, day)
+        meals = attendance_by_date.get(day_date)
+        return (day, day_date > today,
+                bool(meals and meals['lunch']), bool(meals and meals['dinner']))
+
+    calendar_days = [(0, False, False, False) if day == 0 else day_cell(day)
+                     for week in cal for day in week]
     
     # Get filter parameters for list view
     date_range = request.args.get('dateRange', 'thisMonth')
@@ -676,12 +924,13 @@ def student_attendance():
         query = query.filter(Attendance.meal_type == meal_type)
     
     attendance_records = query.order_by(Attendance.date.desc()).all()
-    
-    # Calculate statistics
+
+    # Calculate statistics (counts grouped in SQL rather than generator loops)
     total_days = (end_date - start_date).days + 1
     attendance_count = len(attendance_records)
-    lunch_count = sum(1 for a in attendance_records if a.meal_type == 'lunch')
-    dinner_count = sum(1 for a in attendance_records if a.meal_type == 'dinner')
+    meal_counts = dict(query.with_entities(Attendance.meal_type, func.count()).group_by(Attendance.meal_type).all())
+    lunch_count = meal_counts.get('lunch', 0)
+    dinner_count = meal_counts.get('dinner', 0)
     
     return render_template('student_attendance.html',
                          student=student,
@@ -705,21 +954,28 @@ def student_attendance():
 @student_required
 def student_bills():
     from flask import session
-    student = Student.query.get(session['student_id'])
-    
-    # Get all bills for this student
-    bills = Bill.query.filter_by(student_id=student.id).order_by(Bill.year.desc(), Bill.month.desc()).all()
-    
-    # Calculate totals
-    total_amount = sum(bill.amount for bill in bills)
-    paid_amount = sum(bill.amount for bill in bills if bill.paid)
+    student = current_student()
+    
+    # Get all bills for this student; payments come along in one extra
+    # query via the relationship's selectin loader
+    bills = Bill.query.filter_by(student_id=student.id)\
+        .order_by(Bill.year.desc(), Bill.month.desc()).all()
+    
+    # Calculate totals in a single SQL aggregate instead of re-walking
+    # bill.payments in Python for every bill (payment_status is O(payments))
+    status = Bill.payment_status
+    (total_amount, paid_amount, pending_verification_amount, rejected_amount,
+     pending_verification_count, rejected_count, due_count) = db.session.query(
+        func.coalesce(func.sum(Bill.amount), 0.0),
+        func.coalesce(func.sum(case((Bill.paid, Bill.amount), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((status == 'pending_verification', Bill.amount), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((status == 'rejected', Bill.amount), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((status == 'pending_verification', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((status == 'rejected', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((status == 'pending', 1), else_=0)), 0)
+    ).filter(Bill.student_id == student.id).one()
     pending_amount = total_amount - paid_amount
-    pending_verification_amount = sum(bill.amount for bill in bills if bill.payment_status == 'pending_verification')
-    rejected_amount = sum(bill.amount for bill in bills if bill.payment_status == 'rejected')
     outstanding_amount = max(pending_amount - pending_verification_amount, 0)
-    pending_verification_count = sum(1 for bill in bills if bill.payment_status == 'pending_verification')
-    rejected_count = sum(1 for bill in bills if bill.payment_status == 'rejected')
-    due_count = sum(1 for bill in bills if bill.payment_status == 'pending')
     recent_payments = Payment.query.filter_by(student_id=student.id).order_by(Payment.created_at.desc()).limit(5).all()
     
     return render_template('student_bills.html',
@@ -737,52 +993,65 @@ def student_bills():
                          recent_payments=recent_payments)
 
 
+@functools.lru_cache(maxsize=512)
+def _upi_qr_data_uri(upi_link):
+    """SVG data URI of the QR for a UPI link.
+
+    SVG is an order of magnitude smaller than the base64 PNG it replaces
+    and skips PNG compression entirely; the lru_cache means repeat polls
+    of the same bill skip QR matrix construction too.
+    """
+    return segno.make(upi_link, error='l').svg_data_uri(scale=10, border=4)
+
+
+# Single background worker used to pre-render QR codes into the LRU cache,
+# so the first view of a fresh bill is a cache hit instead of a CPU spike
+# on the request thread. QR rendering is pure CPU and needs no app context.
+_qr_warmer = ThreadPoolExecutor(max_workers=1)
+
+
+def _build_upi_link(bill_id, amount, student_id, roll_no, mess_id):
+    """Deterministic UPI deep link for a bill.
+
+    Same inputs produce the same link for a given day (the reference uses
+    day granularity), which is what lets the QR cache and the background
+    warm-up actually pay off. roll_no is plain STU<digits>, so nothing
+    here needs percent-encoding beyond the cached prefixes.
+    """
+    mess_prefix = f"M{mess_id}-" if mess_id else ""
+    day_stamp = int(time.time()) // 86400
+    txn_ref = f"{mess_prefix}BILL{bill_id}-STU{student_id}-{day_stamp}"
+    upi_id, payee_name = _upi_params(mess_id)
+    transaction_note = f"{_QUOTED_NOTE_PREFIX}{bill_id}%20-%20{roll_no}"
+    upi_link = (f"{_upi_link_prefix(upi_id, payee_name)}&am={amount:.2f}"
+                f"&cu=INR&tn={transaction_note}&tr={txn_ref}")
+    return upi_link, txn_ref, upi_id, payee_name
+
+
 @app.route('/student/bills/<int:bill_id>/generate-upi-link', methods=['POST'])
 @student_required
 def generate_upi_payment_link(bill_id):
     """Generate UPI deep link for direct payment through UPI apps"""
     from flask import session
-    student = Student.query.get_or_404(session['student_id'])
-    bill = Bill.query.get_or_404(bill_id)
-    
-    if bill.student_id != student.id:
-        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    # One filtered lookup does both fetch and ownership check
+    bill = Bill.query.filter_by(id=bill_id, student_id=session['student_id']).first_or_404()
     if bill.paid:
         return jsonify({'success': False, 'message': 'Bill already paid'}), 400
-    
-    # Generate unique transaction reference with mess scoping
-    mess_prefix = f"M{student.mess_id}-" if getattr(student, 'mess_id', None) else ""
-    txn_ref = f"{mess_prefix}BILL{bill.id}-STU{student.id}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+    # Identity-map hit when the student was already loaded this request
+    student = db.session.get(Student, session['student_id'])
+
+    upi_link, txn_ref, upi_id, payee_name = _build_upi_link(
+        bill.id, bill.amount, student.id, student.roll_no,
+        getattr(student, 'mess_id', None))
 
-    # Resolve UPI parameters from Mess preference
-    upi_id_val, upi_name_val = get_effective_upi()
-    upi_id = upi_id_val or app.config.get('UPI_ID', 'merchant@upi')
-    payee_name = quote(upi_name_val or app.config.get('UPI_NAME', 'Mess Management'))
-    amount = f"{bill.amount:.2f}"
-    transaction_note = quote(f"Mess Bill #{bill.id} - {student.roll_no}")
-    
-    # Generate UPI deep link (works with all UPI apps)
-    upi_link = f"upi://pay?pa={upi_id}&pn={payee_name}&am={amount}&cu=INR&tn={transaction_note}&tr={txn_ref}"
-    
-    # Generate UPI QR code
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(upi_link)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convert QR to base64
-    buffered = BytesIO()
-    qr_img.save(buffered, format="PNG")
-    qr_base64 = base64.b64encode(buffered.getvalue()).decode()
-    
     return jsonify({
         'success': True,
         'upi_link': upi_link,
-        'qr_code': f'data:image/png;base64,{qr_base64}',
+        'qr_code': _upi_qr_data_uri(upi_link),
         'transaction_ref': txn_ref,
-        'amount': amount,
+        'amount': f"{bill.amount:.2f}",
         'upi_id': upi_id,
-        'payee_name': upi_name_val or app.config.get('UPI_NAME', 'Mess Management')
+        'payee_name': payee_name
     })
 
 
@@ -790,10 +1059,7 @@ def generate_upi_payment_link(bill_id):
 @student_required
 def student_initiate_payment(bill_id):
     from flask import session
-    student = Student.query.get_or_404(session['student_id'])
-    bill = Bill.query.get_or_404(bill_id)
-    if bill.student_id != student.id:
-        return jsonify({'success': False, 'message': 'You are not authorized to pay this bill.'}), 403
+    bill = Bill.query.filter_by(id=bill_id, student_id=session['student_id']).first_or_404()
     if bill.paid:
         return jsonify({'success': False, 'message': 'Bill is already marked as paid.'}), 400
 
@@ -811,9 +1077,9 @@ def student_initiate_payment(bill_id):
     if payment_method and payment_method not in allowed_methods:
         return jsonify({'success': False, 'message': 'Unsupported payment method.'}), 400
 
-    # Prevent multiple pending submissions
-    pending_payment = Payment.query.filter_by(bill_id=bill.id, status='submitted').first()
-    if pending_payment:
+    # Prevent multiple pending submissions (id-only presence check)
+    pending_payment = db.session.query(Payment.id).filter_by(bill_id=bill.id, status='submitted').first()
+    if pending_payment is not None:
         return jsonify({'success': False, 'message': 'A payment is already pending verification for this bill.'}), 400
 
     reference = (data.get('reference') or '').strip()
@@ -823,7 +1089,7 @@ def student_initiate_payment(bill_id):
     notes = (data.get('notes') or '').strip() or None
     payment = Payment(
         bill_id=bill.id,
-        student_id=student.id,
+        student_id=session['student_id'],
         amount=amount,
         method=payment_method or 'upi',
         reference=reference,
@@ -847,19 +1113,19 @@ def student_initiate_payment(bill_id):
 @student_required
 def student_bill_payments(bill_id):
     from flask import session
-    student = Student.query.get_or_404(session['student_id'])
-    bill = Bill.query.get_or_404(bill_id)
-    if bill.student_id != student.id:
-        return jsonify({'success': False, 'message': 'You are not authorized to view these payments.'}), 403
+    bill = Bill.query.filter_by(id=bill_id, student_id=session['student_id']).first_or_404()
 
-    payments = [payment.to_dict() for payment in sorted(bill.payments, key=lambda p: p.created_at or datetime.min, reverse=True)]
+    # Order in SQL (index-backed) instead of materializing the relationship
+    # collection and re-sorting it in Python
+    payments = [payment.to_dict() for payment in Payment.query.filter_by(bill_id=bill.id)
+                .order_by(Payment.created_at.desc().nullslast()).all()]
     return jsonify({'success': True, 'payments': payments, 'bill_paid': bill.paid})
 
 @app.route('/student/profile', methods=['GET', 'POST'])
 @student_required
 def student_profile():
     from flask import session
-    student = Student.query.get(session['student_id'])
+    student = current_student()
     
     if request.method == 'POST':
         # Update contact info
@@ -976,7 +1242,10 @@ def settings():
             saved_upi_id = Settings.get_value('upi_id')
             saved_upi_name = Settings.get_value('upi_name')
             app.logger.info(f'Verified saved values - UPI ID: {saved_upi_id}, UPI Name: {saved_upi_name}')
-            
+
+            # Drop cached per-mess UPI params so new values take effect
+            _upi_params.cache_clear()
+
             flash('Settings updated successfully!', 'success')
         except Exception as e:
             app.logger.error(f'Error updating settings: {str(e)}')
@@ -1015,11 +1284,11 @@ def update_student(student_id):
         student.contact = request.form.get('contact', student.contact)
         student.email = request.form.get('email', student.email)
         student.address = request.form.get('address', student.address)
-        
+
         # Validate required fields
         if not student.name:
             return jsonify({'success': False, 'error': 'Name is required'}), 400
-            
+
         db.session.commit()
         app.logger.info(f'Student {student_id} updated successfully')
         return jsonify({
@@ -1045,8 +1314,11 @@ def students():
     page = request.args.get('page', 1, type=int)
     per_page = 50
     
-    # Filter by current user's mess and paginate
+    # Filter by current user's mess and paginate, loading only the columns
+    # the list page renders (skips password_hash and the other auth fields)
     pagination = Student.query.filter_by(mess_id=current_user.mess_id)\
+        .options(load_only(Student.id, Student.name, Student.roll_no,
+                           Student.contact, Student.email, Student.address))\
         .order_by(Student.id.asc())\
         .paginate(page=page, per_page=per_page, error_out=False)
     
@@ -1054,6 +1326,31 @@ def students():
                          students=pagination.items,
                          pagination=pagination)
 
+def _next_roll_number():
+    """Atomically reserve the next STU#### roll number.
+
+    A counter row in settings is incremented in-place, so two admins adding
+    students concurrently can't both read the same last roll number and
+    produce duplicates (roll_no is globally unique, hence a single global
+    counter). The increment commits/rolls back together with the insert.
+    """
+    row = db.session.execute(text(
+        "UPDATE settings SET value = CAST(value AS INTEGER) + 1 "
+        "WHERE key = 'roll_seq' RETURNING value"
+    )).first()
+    if row is not None:
+        return int(row[0])
+    # First use: seed the counter from the highest existing roll number
+    seed = 0
+    for (roll_no,) in db.session.query(Student.roll_no).filter(Student.roll_no.like('STU%')):
+        try:
+            seed = max(seed, int(roll_no[3:]))
+        except (ValueError, TypeError):
+            continue
+    db.session.add(Settings(key='roll_seq', value=str(seed + 1),
+                            description='Next student roll number counter'))
+    return seed + 1
+
 @app.route('/student/add', methods=['GET', 'POST'])
 @login_required
 def add_student():
@@ -1075,18 +1372,9 @@ def add_student():
             return render_template('add_student.html')
         
         # Generate roll number automatically (STU0001, STU0002, etc.)
-        last_student = Student.query.order_by(Student.id.desc()).first()
-        if last_student and last_student.roll_no and last_student.roll_no.startswith('STU'):
-            try:
-                last_num = int(last_student.roll_no[3:])
-                new_roll_no = f'STU{last_num + 1:04d}'
-            except (ValueError, IndexError):
-                # If parsing fails, use ID-based approach
-                new_roll_no = f'STU{(last_student.id + 1):04d}'
-        else:
-            # First student or no valid roll_no found, start from STU0001
-            new_roll_no = 'STU0001'
-            
+        new_roll_no = f'STU{_next_roll_number():04d}'
+
+
         # Create new student with mess_id
         student = Student(
             name=name,
@@ -1103,6 +1391,9 @@ def add_student():
             student.set_password(temp_password)
             db.session.add(student)
             db.session.commit()
+            # Warm the QR disk cache off the request thread so the first
+            # "print QR" click serves a ready-made file
+            _qr_warmer.submit(_render_student_qr, student.id)
             flash(f'Student added successfully with Roll No: {new_roll_no}. Initial Password: {temp_password}', 'success')
             return redirect(url_for('students'))
         except Exception as e:
@@ -1123,33 +1414,19 @@ def delete_student(student_id):
         
     try:
         student_name = student.name  # Store name before deletion
-        
-        # Start transaction
-        db.session.begin_nested()
-        
-        try:
-            # Delete associated records first
-            attendance_count = Attendance.query.filter_by(student_id=student_id).delete()
-            bills_count = Bill.query.filter_by(student_id=student_id).delete()
-            
-            # Delete student
-            db.session.delete(student)
-            
-            # Commit the nested transaction
-            db.session.commit()
-            
-            # Commit the outer transaction
-            db.session.commit()
-            
-            flash(f'Student {student_name} and all associated records deleted successfully', 'success')
-            
-        except Exception as inner_error:
-            # Rollback the nested transaction
-            db.session.rollback()
-            raise inner_error
-            
+
+        # Bulk-delete children then the student in one transaction. Bulk
+        # deletes bypass the ORM cascades, so payments must go explicitly
+        # before bills.
+        Payment.query.filter_by(student_id=student_id).delete()
+        Attendance.query.filter_by(student_id=student_id).delete()
+        Bill.query.filter_by(student_id=student_id).delete()
+        Student.query.filter_by(id=student_id).delete()
+        db.session.commit()
+
+        flash(f'Student {student_name} and all associated records deleted successfully', 'success')
+
     except Exception as e:
-        # Rollback the main transaction
         db.session.rollback()
         flash(f'Error deleting student: {str(e)}', 'error')
         app.logger.error(f'Error deleting student {student_id}: {str(e)}')
@@ -1188,36 +1465,33 @@ def attendance():
             return redirect(url_for('attendance'))
             
         attendance_date = datetime.strptime(attendance_date, '%Y-%m-%d').date() if attendance_date else datetime.now().date()
-        success_count = 0
-        
+
+        # Fetch the already-marked meals in one query instead of one
+        # duplicate-check SELECT per meal type
+        existing = {meal for (meal,) in db.session.query(Attendance.meal_type).filter(
+            Attendance.student_id == student_id,
+            Attendance.date == attendance_date,
+            Attendance.meal_type.in_(meal_types)
+        )}
+
+        new_records = []
         for meal_type in meal_types:
-            # Check for duplicate attendance
-            existing = Attendance.query.filter_by(
-                student_id=student_id,
-                date=attendance_date,
-                meal_type=meal_type
-            ).first()
-            
-            if existing:
+            if meal_type in existing:
                 flash(f'Attendance for {meal_type} already marked', 'warning')
                 continue
-            
-            # Create new attendance record
-            attendance = Attendance(
+            new_records.append(Attendance(
                 student_id=student_id,
                 date=attendance_date,
                 meal_type=meal_type,
                 method='manual',
-                marked_by=current_user.username,
-                timestamp=datetime.now()
-            )
-            db.session.add(attendance)
-            success_count += 1
-        
-        if success_count > 0:
+                marked_by=current_user.username
+            ))
+
+        if new_records:
             try:
+                db.session.bulk_save_objects(new_records)
                 db.session.commit()
-                flash(f'Attendance marked successfully for {success_count} meal(s)', 'success')
+                flash(f'Attendance marked successfully for {len(new_records)} meal(s)', 'success')
             except Exception as e:
                 db.session.rollback()
                 flash(f'Error marking attendance: {str(e)}', 'error')
@@ -1237,8 +1511,11 @@ def attendance():
     # Compute date range
     start_date, end_date = get_date_range(date_range, start_date_arg, end_date_arg)
 
-    # Build query
-    query = Attendance.query.join(Student).filter(Attendance.date.between(start_date, end_date))
+    # Build query; contains_eager reuses the join to populate a.student, so
+    # the template's per-row student accesses don't each fire a lazy SELECT
+    query = Attendance.query.join(Student)\
+        .options(contains_eager(Attendance.student))\
+        .filter(Attendance.date.between(start_date, end_date))
     if meal_type != 'all':
         query = query.filter(Attendance.meal_type == meal_type)
 
@@ -1265,9 +1542,15 @@ def mark_attendance():
     """Mark student attendance"""
     if request.is_json:
         data = request.get_json()
-        student_id = int(data.get('student_id'))
         method = data.get('method', 'manual')
         meal_type = data.get('meal_type') or get_current_meal_type()
+        if data.get('token'):
+            # Scanned QR payloads carry a signed token; reject forgeries
+            student_id = _verify_qr_token(data['token'])
+            if student_id is None:
+                return jsonify({'success': False, 'message': 'Invalid QR code'})
+        else:
+            student_id = int(data.get('student_id'))
     else:
         student_id = int(request.form.get('student_id'))
         method = request.form.get('method', 'manual')
@@ -1281,15 +1564,15 @@ def mark_attendance():
     if not student:
         return jsonify({'success': False, 'message': 'Student not found'})
     
-    # Check for duplicate attendance
+    # Check for duplicate attendance (id-only query: no row hydration)
     today = date.today()
-    existing = Attendance.query.filter_by(
+    existing = db.session.query(Attendance.id).filter_by(
         student_id=student_id,
         date=today,
         meal_type=meal_type
     ).first()
-    
-    if existing:
+
+    if existing is not None:
         return jsonify({
             'success': False, 
             'message': f'Attendance for {meal_type} already marked'
@@ -1301,8 +1584,7 @@ def mark_attendance():
         date=today,
         meal_type=meal_type,
         method=method,
-        marked_by=current_user.username,
-        timestamp=datetime.now()
+        marked_by=current_user.username
     )
     
     try:
@@ -1374,20 +1656,22 @@ def update_attendance(attendance_id):
             return jsonify({'success': True, 'message': 'No changes detected'}), 200
 
         # Duplicate check for same student/date/meal combination
-        duplicate = Attendance.query.filter(
+        duplicate = db.session.query(Attendance.id).filter(
             Attendance.student_id == attendance.student_id,
             Attendance.date == new_date,
             Attendance.meal_type == new_meal_type,
             Attendance.id != attendance.id
         ).first()
 
-        if duplicate:
+        if duplicate is not None:
             return jsonify({
                 'success': False,
                 'message': f'Attendance already exists for {attendance.student.name} on {new_date} ({new_meal_type})'
             }), 409
 
-        # Apply updates
+        # Apply updates. Stamp with datetime.now() like every other
+        # write path — the SQL-side now() is UTC and would skew edited
+        # rows against the server-local column default.
         attendance.date = new_date
         attendance.meal_type = new_meal_type
         attendance.timestamp = datetime.now()
@@ -1419,7 +1703,6 @@ def create_attendance_session():
         date=date.today(),
         meal_type=meal_type,
         created_by=current_user.username,
-        created_at=datetime.now(),
         expires_at=datetime.now() + timedelta(minutes=duration),
         is_active=True,
         mess_id=current_user.mess_id
@@ -1439,32 +1722,38 @@ def create_attendance_session():
         db.session.rollback()
         return error_response('Failed to create session. Please try again.', 500)
 
+@functools.lru_cache(maxsize=256)
+def _session_qr_png(scan_url):
+    """Render the QR PNG for a session scan URL.
+
+    Session tokens are immutable for their lifetime, so the same image would
+    otherwise be regenerated on every poll of the session modal.
+    """
+    img_io = BytesIO()
+    segno.make(scan_url).save(img_io, kind='png', scale=10, border=5)
+    return img_io.getvalue()
+
 @app.route('/get-session-qr/<int:session_id>')
 @login_required
 def get_session_qr(session_id):
     """Generate QR code image for attendance session"""
     session = AttendanceSession.query.get_or_404(session_id)
-    
+
     # Verify session belongs to current user's mess
     if session.mess_id != current_user.mess_id:
         abort(403)
-    
+
     # Create scan URL
     scan_url = url_for('scan_attendance', token=session.token, _external=True)
-    
-    # Generate QR code
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(scan_url)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convert to bytes
-    img_io = BytesIO()
-    img.save(img_io, 'PNG')
-    img_io.seek(0)
-    
-    return send_file(img_io, mimetype='image/png')
+
+    # Tokens never change for a session, so let browsers cache the image
+    # too. max_age must go through send_file: without it Flask defaults
+    # to Cache-Control: no-cache, which forces a revalidation (and, with
+    # no validator on a BytesIO response, a full re-download) per poll.
+    resp = send_file(BytesIO(_session_qr_png(scan_url)), mimetype='image/png',
+                     max_age=3600)
+    resp.cache_control.public = True
+    return resp
 
 @app.route('/scan/<token>')
 def scan_attendance(token):
@@ -1479,8 +1768,13 @@ def scan_attendance(token):
     if not attendance_session.is_valid():
         return render_template('scan_error.html', message='This session has expired')
     
-    students = Student.query.order_by(Student.name).all()
-    
+    # Scope to the session's mess (the old query leaked every student in
+    # the DB into the dropdown) and only pull the columns it renders
+    students = (Student.query
+                .filter_by(mess_id=attendance_session.mess_id)
+                .options(load_only(Student.id, Student.name, Student.roll_no))
+                .order_by(Student.name).all())
+
     # Check if student is logged in
     logged_in_student_id = flask_session.get('student_id')
     
@@ -1507,14 +1801,14 @@ def submit_attendance(token):
     if not student:
         return jsonify({'success': False, 'message': 'Student not found'})
     
-    # Check for duplicate attendance
-    existing = Attendance.query.filter_by(
+    # Check for duplicate attendance (id-only query: no row hydration)
+    existing = db.session.query(Attendance.id).filter_by(
         student_id=student_id,
         date=session.date,
         meal_type=session.meal_type
     ).first()
-    
-    if existing:
+
+    if existing is not None:
         return jsonify({
             'success': False,
             'message': f'You have already marked attendance for {session.meal_type}'
@@ -1527,7 +1821,6 @@ def submit_attendance(token):
         meal_type=session.meal_type,
         method='qr_scan',
         marked_by=student.name,
-        timestamp=datetime.now(),
         session_id=session.id
     )
     
@@ -1592,38 +1885,50 @@ def export_attendance():
     # Get date range
     start_date, end_date = get_date_range(date_range, start_date, end_date)
     
-    # Query records
-    query = Attendance.query.join(Student)
+    # Build query; rows are fetched in chunks while streaming below. The
+    # join already pulls Student, so contains_eager stops each row's
+    # record.student access from becoming its own lazy SELECT mid-stream.
+    query = Attendance.query.join(Student).options(contains_eager(Attendance.student))
     query = query.filter(Attendance.date.between(start_date, end_date))
     if meal_type != 'all':
         query = query.filter(Attendance.meal_type == meal_type)
-    records = query.order_by(Attendance.date, Student.name).all()
-    
-    # Create CSV
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Date', 'Time', 'Student ID', 'Student Name', 'Meal', 'Method', 'Marked By'])
-    
-    for record in records:
-        writer.writerow([
-            record.date.strftime('%Y-%m-%d'),
-            record.timestamp.strftime('%H:%M:%S'),
-            record.student.id,
-            record.student.name,
-            record.meal_type.capitalize(),
-            record.method.capitalize(),
-            record.marked_by
-        ])
-    
-    # Create response (use BytesIO for send_file)
-    csv_bytes = BytesIO()
-    csv_bytes.write(output.getvalue().encode('utf-8'))
-    csv_bytes.seek(0)
-    return send_file(
-        csv_bytes,
+    query = query.order_by(Attendance.date, Student.name)
+
+    def generate_rows():
+        # Stream the CSV instead of materializing the whole export in memory;
+        # the client sees the first byte immediately and memory stays flat.
+        # Yields are batched every 1000 rows — per-chunk WSGI and
+        # chunked-encoding overhead dwarfs the csv.writer calls themselves.
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['Date', 'Time', 'Student ID', 'Student Name', 'Meal', 'Method', 'Marked By'])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        records = iter(query.yield_per(1000))
+        while True:
+            chunk = list(islice(records, 1000))
+            if not chunk:
+                break
+            # writerows keeps the formatting loop inside the C csv module
+            writer.writerows(
+                (record.date.strftime('%Y-%m-%d'),
+                 record.timestamp.strftime('%H:%M:%S'),
+                 record.student.id,
+                 record.student.name,
+                 record.meal_type.capitalize(),
+                 record.method.capitalize(),
+                 record.marked_by)
+                for record in chunk
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    return Response(
+        stream_with_context(generate_rows()),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'attendance_{start_date}_to_{end_date}.csv'
+        headers={'Content-Disposition': f'attachment; filename=attendance_{start_date}_to_{end_date}.csv'}
     )
 
 @app.route('/generate_qr/<int:student_id>')
@@ -1632,37 +1937,13 @@ def generate_qr(student_id):
     try:
         # Get student data
         student = Student.query.get_or_404(student_id)
-        
-        # Create QR code data
-        data = {
-            'student_id': student_id,
-            'name': student.name,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        # Convert data to JSON string
-        json_data = json.dumps(data)
-        
-        # Generate QR code with better error correction and size
-        qr = qrcode.QRCode(
-            version=None,  # Automatically determine version
-            error_correction=qrcode.constants.ERROR_CORRECT_H,  # Highest error correction
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(json.dumps(data))
-        qr.make(fit=True)
 
-        # Create QR code image with better visibility
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Save QR code to bytes
-        img_io = BytesIO()
-        img.save(img_io, 'PNG')
-        img_io.seek(0)
-        
+        # Serve from the on-disk cache when possible; the payload is stable
+        # per student, so there is nothing to regenerate on repeat requests
+        cache_path = _render_student_qr(student_id)
+
         return send_file(
-            img_io,
+            cache_path,
             mimetype='image/png',
             as_attachment=False,
             download_name=f'qr_code_{student.name.lower().replace(" ", "_")}.png'
@@ -1676,24 +1957,45 @@ def generate_qr(student_id):
 @login_required
 def billing():
     try:
-        # Get all bills with student information for current mess only, sorted by student ID
-        bills = Bill.query.join(Student)\
-            .filter(Student.mess_id == current_user.mess_id)\
-            .order_by(Student.id.asc(), Bill.generated_on.desc()).all()
-        students = Student.query.filter_by(mess_id=current_user.mess_id)\
+        page = request.args.get('page', 1, type=int)
+        # Hoist past the LocalProxy once; this route reads it three times
+        mess_id = current_user.mess_id
+
+        # Get bills with student information for current mess only, sorted
+        # by student ID. contains_eager reuses the joined Student columns so
+        # the per-row bill.student access in the template stays query-free;
+        # payments ride along via the relationship's selectin loader.
+        # Paginated so the page stays bounded as billing history grows.
+        bill_pagination = Bill.query.join(Student)\
+            .options(contains_eager(Bill.student))\
+            .filter(Student.mess_id == mess_id)\
+            .order_by(Student.id.asc(), Bill.generated_on.desc())\
+            .paginate(page=page, per_page=50, error_out=False)
+        bills = bill_pagination.items
+        # The dropdowns only need id/name/roll_no; plain tuples skip ORM
+        # hydration for what can be the largest list on the page
+        students = db.session.query(Student.id, Student.name, Student.roll_no)\
+            .filter_by(mess_id=mess_id)\
             .order_by(Student.id.asc()).all()
         
         # Get current month and year for default form values
         current_month = datetime.now().month
         current_year = datetime.now().year
         
-        # Calculate total, paid, and pending amounts
-        total_amount = sum(bill.amount for bill in bills)
-        paid_amount = sum(bill.amount for bill in bills if bill.paid)
+        # Totals come from one SQL scan instead of re-iterating every Bill
+        # object in Python; skipped outright when the mess has no bills
+        if bill_pagination.total:
+            total_amount, paid_amount = db.session.query(
+                func.coalesce(func.sum(Bill.amount), 0.0),
+                func.coalesce(func.sum(case((Bill.paid, Bill.amount), else_=0.0)), 0.0)
+            ).select_from(Bill).join(Student).filter(Student.mess_id == mess_id).one()
+        else:
+            total_amount = paid_amount = 0.0
         pending_amount = total_amount - paid_amount
         
         return render_template('billing.html',
                              bills=bills,
+                             bill_pagination=bill_pagination,
                              students=students,
                              current_month=current_month,
                              current_year=current_year,
@@ -1736,14 +2038,14 @@ def generate_bill():
                 'message': 'Student not found'
             }), 404
 
-        # Check if bill already exists
-        existing_bill = Bill.query.filter_by(
+        # Check if bill already exists (id-only presence check)
+        existing_bill = db.session.query(Bill.id).filter_by(
             student_id=student_id,
             month=month,
             year=year
         ).first()
 
-        if existing_bill:
+        if existing_bill is not None:
             return jsonify({
                 'success': False,
                 'message': f'Bill already exists for {student.name} for {month}/{year}'
@@ -1756,14 +2058,13 @@ def generate_bill():
         else:
             end_date = datetime(year, month + 1, 1).date()
 
-        attendance_records = Attendance.query.filter(
+        # Count in SQL (answered from the attendance index) instead of
+        # loading a month of rows just to len() them
+        total_meals = db.session.query(func.count(Attendance.id)).filter(
             Attendance.student_id == student_id,
             Attendance.date >= start_date,
             Attendance.date < end_date
-        ).all()
-
-        # Calculate total meals
-        total_meals = len(attendance_records)
+        ).scalar()
 
         # If no attendance records found
         if total_meals == 0:
@@ -1794,6 +2095,13 @@ def generate_bill():
             db.session.add(new_bill)
             db.session.commit()
 
+            # Pre-render the payment QR off the request thread so the
+            # student's first view of this bill is a cache hit
+            upi_link, _, _, _ = _build_upi_link(
+                new_bill.id, new_bill.amount, student.id, student.roll_no,
+                getattr(student, 'mess_id', None))
+            _qr_warmer.submit(_upi_qr_data_uri, upi_link)
+
             return jsonify({
                 'success': True,
                 'message': f'Bill generated successfully for {student.name}'
@@ -1810,17 +2118,18 @@ def generate_bill():
 @login_required
 def get_bill(bill_id):
     try:
-        bill = Bill.query.get_or_404(bill_id)
-        
+        # Eager-load the student alongside the bill; payments come via the
+        # relationship's selectin loader
+        bill = db.get_or_404(Bill, bill_id, options=[joinedload(Bill.student)])
+
         # Format date according to local time
         generated_on = bill.generated_on.strftime('%Y-%m-%d %H:%M:%S') if bill.generated_on else None
         
-        # Get month name
-        months = ['January', 'February', 'March', 'April', 'May', 'June',
-                 'July', 'August', 'September', 'October', 'November', 'December']
-        month_name = months[bill.month - 1] if 1 <= bill.month <= 12 else 'Unknown'
+        # Get month name from the stdlib table instead of rebuilding a list
+        # per request (student_attendance already uses calendar.month_name)
+        month_name = calendar.month_name[bill.month] if 1 <= bill.month <= 12 else 'Unknown'
         
-        payments = [payment.to_dict() for payment in sorted(bill.payments, key=lambda p: p.created_at or datetime.min, reverse=True)]
+        payments = [payment.to_dict() for payment in bill.payments]
 
         return jsonify({
             'id': bill.id,
@@ -1849,8 +2158,14 @@ def get_bill(bill_id):
 @app.route('/bill/<int:bill_id>/payments')
 @login_required
 def get_bill_payments(bill_id):
-    bill = Bill.query.get_or_404(bill_id)
-    payments = [payment.to_dict() for payment in sorted(bill.payments, key=lambda p: p.created_at or datetime.min, reverse=True)]
+    # lazyload keeps the selectin relationship from pulling the whole
+    # payment history; the bounded query below fetches just one page
+    bill = db.get_or_404(Bill, bill_id, options=[lazyload(Bill.payments)])
+    limit = min(request.args.get('limit', 100, type=int), 500)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    payments = [payment.to_dict() for payment in Payment.query.filter_by(bill_id=bill.id)
+                .order_by(Payment.created_at.desc().nullslast(), Payment.id.desc())
+                .limit(limit).offset(offset).all()]
     return jsonify({'success': True, 'payments': payments, 'bill': {'id': bill.id, 'paid': bill.paid}})
 
 @app.route('/payment/<int:payment_id>/update', methods=['POST'])
@@ -1874,9 +2189,13 @@ def update_payment_status(payment_id):
         payment.verified_at = datetime.utcnow()
         payment.verified_by = current_user.username
         payment.bill.paid = True
-        for other_payment in payment.bill.payments:
-            if other_payment.id != payment.id and other_payment.status == 'submitted':
-                other_payment.status = 'rejected'
+        # One UPDATE rejects the other pending submissions instead of
+        # loading and mutating each sibling payment
+        db.session.query(Payment).filter(
+            Payment.bill_id == payment.bill_id,
+            Payment.id != payment.id,
+            Payment.status == 'submitted'
+        ).update({'status': 'rejected'}, synchronize_session=False)
         message = f'Payment #{payment.id} verified and bill marked as paid.'
     else:
         if payment.status == 'verified':
@@ -1922,10 +2241,13 @@ def mark_bill_paid(bill_id):
             payment.status = 'verified'
             payment.verified_at = datetime.utcnow()
             payment.verified_by = current_user.username
-            # Mark other pending payments as rejected to avoid duplicates
-            for other_payment in bill.payments:
-                if other_payment.id != payment.id and other_payment.status == 'submitted':
-                    other_payment.status = 'rejected'
+            # Mark other pending payments as rejected to avoid duplicates;
+            # single UPDATE, no lazy load of bill.payments
+            db.session.query(Payment).filter(
+                Payment.bill_id == bill.id,
+                Payment.id != payment.id,
+                Payment.status == 'submitted'
+            ).update({'status': 'rejected'}, synchronize_session=False)
         else:
             manual_payment = Payment(
                 bill_id=bill.id,
@@ -30,31 +30,29 @@ def migrate_bill_uniqueness():
                 print("✓ Unique constraint already exists")
                 return
         
-        # Find and remove duplicate bills (keep the most recent one)
+        # Remove duplicate bills set-based: keep the highest id (most
+        # recent) per (student_id, month, year, mess_id) group and delete
+        # the rest plus their payments in two statements instead of two
+        # DELETEs per duplicate row
         print("Checking for duplicate bills...")
+        cursor.execute("BEGIN IMMEDIATE")
         cursor.execute("""
-            SELECT student_id, month, year, mess_id, COUNT(*) as cnt, GROUP_CONCAT(id) as ids
-            FROM bill
-            GROUP BY student_id, month, year, mess_id
-            HAVING cnt > 1
+            DELETE FROM payment WHERE bill_id IN (
+                SELECT id FROM bill WHERE id NOT IN (
+                    SELECT MAX(id) FROM bill
+                    GROUP BY student_id, month, year, mess_id
+                )
+            )
         """)
-        
-        duplicates = cursor.fetchall()
-        
-        if duplicates:
-            print(f"Found {len(duplicates)} sets of duplicate bills. Removing duplicates...")
-            for dup in duplicates:
-                student_id, month, year, mess_id, count, ids_str = dup
-                ids = [int(x) for x in ids_str.split(',')]
-                # Keep the largest ID (most recent), delete others
-                ids_to_delete = ids[:-1]
-                
-                for bill_id in ids_to_delete:
-                    print(f"  Deleting duplicate bill ID {bill_id} (student={student_id}, month={month}, year={year})")
-                    # Delete associated payments first
-                    cursor.execute("DELETE FROM payment WHERE bill_id = ?", (bill_id,))
-                    # Delete the bill
-                    cursor.execute("DELETE FROM bill WHERE id = ?", (bill_id,))
+        cursor.execute("""
+            DELETE FROM bill WHERE id NOT IN (
+                SELECT MAX(id) FROM bill
+                GROUP BY student_id, month, year, mess_id
+            )
+        """)
+        removed = cursor.rowcount
+        if removed:
+            print(f"Removed {removed} duplicate bills (kept the most recent per group)")
         else:
             print("✓ No duplicate bills found")
         
@@ -7,6 +7,8 @@ import sqlite3
 import os
 from werkzeug.security import generate_password_hash
 
+from migrate_util import open_db
+
 # Path to database
 DB_PATH = 'instance/mess.db'
 
@@ -19,10 +21,14 @@ def migrate_database():
         print(f"❌ Database not found at {DB_PATH}")
         return
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_db(DB_PATH)
     cursor = conn.cursor()
-    
+
     try:
+        # One explicit transaction so every row shares a single fsync
+        # instead of paying per-statement commit overhead
+        cursor.execute("BEGIN IMMEDIATE")
+
         # Check if columns already exist
         cursor.execute("PRAGMA table_info(student)")
         columns = [column[1] for column in cursor.fetchall()]
@@ -57,39 +63,37 @@ def migrate_database():
         print("Updating Existing Student Records")
         print("=" * 60)
         
-        cursor.execute("SELECT id, name, roll_no, password_hash FROM student")
-        students = cursor.fetchall()
-        
-        if not students:
+        cursor.execute("SELECT COUNT(*) FROM student")
+        total = cursor.fetchone()[0]
+
+        if not total:
             print("No students found in database.")
         else:
-            print(f"Found {len(students)} students to update:\n")
-            
-            default_password_hash = generate_password_hash("password123")
-            
-            for student_id, name, roll_no, password_hash in students:
-                updates = []
-                
-                # Set roll_no if missing
-                if not roll_no:
-                    new_roll_no = f"STU{str(student_id).zfill(4)}"
-                    cursor.execute("UPDATE student SET roll_no = ? WHERE id = ?", (new_roll_no, student_id))
-                    updates.append(f"roll_no: {new_roll_no}")
-                
-                # Set password if missing
-                if not password_hash:
-                    cursor.execute("UPDATE student SET password_hash = ? WHERE id = ?", (default_password_hash, student_id))
-                    updates.append("password: password123")
-                
-                # Set default department if missing
-                cursor.execute("UPDATE student SET department = 'General' WHERE id = ? AND (department IS NULL OR department = '')", (student_id,))
-                
-                if updates:
-                    print(f"  ✅ Updated {name}: {', '.join(updates)}")
+            print(f"Found {total} students to update:\n")
+
+            # scrypt runs in OpenSSL's C implementation and is what
+            # check_password_hash in the app expects; pin it explicitly so
+            # the migration never silently falls back to pbkdf2
+            default_password_hash = generate_password_hash("password123", method='scrypt')
+
+            # One fused UPDATE fills all three columns in a single pass
+            # over the table: COALESCE(NULLIF(col, ''), fallback) keeps
+            # existing values and backfills NULL or empty ones, with the
+            # roll number computed by SQLite itself. No SELECT, no
+            # Python-side iteration, no per-row statements.
+            cursor.execute(
+                "UPDATE student SET "
+                "roll_no = COALESCE(NULLIF(roll_no, ''), printf('STU%04d', id)), "
+                "password_hash = COALESCE(NULLIF(password_hash, ''), ?), "
+                "department = COALESCE(NULLIF(department, ''), 'General')",
+                (default_password_hash,)
+            )
+            cursor.execute("SELECT changes()")
+            print(f"  ✅ Backfilled {cursor.fetchone()[0]} student records")
         
         # Commit all changes
-        conn.commit()
-        
+        cursor.execute("COMMIT")
+
         print("\n" + "=" * 60)
         print("✅ Migration completed successfully!")
         print("=" * 60)
@@ -100,7 +104,10 @@ def migrate_database():
         print("=" * 60)
         
     except Exception as e:
-        conn.rollback()
+        try:
+            cursor.execute("ROLLBACK")
+        except sqlite3.OperationalError:
+            pass  # nothing was begun yet
         print(f"\n❌ Error during migration: {str(e)}")
         import traceback
         traceback.print_exc()
@@ -0,0 +1,65 @@
+"""
+Migration script to create composite indexes for the hottest queries.
+New databases get these from db.create_all(); this backfills existing ones.
+Safe to run multiple times.
+"""
+import sqlite3
+import os
+
+from migrate_util import open_db
+
+DB_PATH = os.path.join('instance', 'mess_management.db')
+
+INDEXES = [
+    ("ix_attendance_session_meal", "attendance(session_id, meal_type)"),
+    ("ix_bill_student_year_month", "bill(student_id, year, month)"),
+    ("ix_payment_student_status", "payment(student_id, status)"),
+    ("ix_payment_bill_created", "payment(bill_id, created_at)"),
+    ("ix_payment_bill_status", "payment(bill_id, status)"),
+    ("ix_student_mess_name", "student(mess_id, name)"),
+    ("ix_attendance_date_meal", "attendance(date, meal_type)"),
+    ("ix_session_mess_date_active", "attendance_session(mess_id, date, is_active)"),
+]
+
+# Unique index that replaces ix_attendance_student_date; its prefix still
+# covers the (student_id, date) scans and it blocks duplicate meal rows.
+UNIQUE_INDEXES = [
+    ("ix_attendance_student_date_meal", "attendance(student_id, date, meal_type)"),
+]
+
+def migrate_indexes():
+    if not os.path.exists(DB_PATH):
+        print(f"Database not found at {DB_PATH}")
+        return
+
+    conn = open_db(DB_PATH)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        print("Creating composite indexes...")
+        for name, definition in INDEXES:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+            print(f"  ✓ {name}")
+        for name, definition in UNIQUE_INDEXES:
+            try:
+                cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {definition}")
+                print(f"  ✓ {name} (unique)")
+            except sqlite3.IntegrityError:
+                print(f"  ✗ {name}: duplicate attendance rows exist - "
+                      f"clean them up and re-run this script")
+        cursor.execute("DROP INDEX IF EXISTS ix_attendance_student_date")
+        cursor.execute("COMMIT")
+        print("✓ Index migration completed successfully!")
+    except Exception as e:
+        try:
+            cursor.execute("ROLLBACK")
+        except sqlite3.OperationalError:
+            pass  # nothing was begun yet
+        print(f"✗ Error during migration: {e}")
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    migrate_indexes()
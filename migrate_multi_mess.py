@@ -7,27 +7,37 @@ import sqlite3
 import os
 from datetime import datetime
 
+from migrate_util import open_db
+
 DB_PATH = os.path.join('instance','mess.db')
 
-def column_exists(cursor, table, column):
+def table_columns(cursor, table):
     cursor.execute(f"PRAGMA table_info({table})")
-    return column in [row[1] for row in cursor.fetchall()]
+    return {row[1] for row in cursor.fetchall()}
 
-def table_exists(cursor, table):
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,))
-    return cursor.fetchone() is not None
+def existing_tables(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    return {row[0] for row in cursor.fetchall()}
 
 def migrate():
     if not os.path.exists(DB_PATH):
         print(f"Database not found at {DB_PATH}. Run app once to create it.")
         return
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_db(DB_PATH)
     cur = conn.cursor()
 
     try:
         print("== Multi-mess Migration ==")
-        # 1. Create Mess table if missing
-        if not table_exists(cur, 'mess'):
+        # One explicit transaction around the DDL and the backfill:
+        # SQLite runs ALTER TABLE inside transactions fine, and this way
+        # the five backfill UPDATEs share a single fsync at commit
+        # instead of landing as separate auto-committed writes
+        cur.execute("BEGIN IMMEDIATE")
+
+        # 1. Create Mess table if missing. One sqlite_master query gives
+        # the whole table set; membership tests are then dict lookups.
+        tables = existing_tables(cur)
+        if 'mess' not in tables:
             print("Creating 'mess' table...")
             cur.execute("""
                 CREATE TABLE mess (
@@ -43,10 +53,12 @@ def migrate():
         else:
             print("'mess' table already exists.")
 
-        # 2. Add mess_id columns
+        # 2. Add mess_id columns. One PRAGMA per table up-front rather
+        # than one per column checked.
         targets = ['user','student','attendance_session','bill','payment']
+        cols = {t: table_columns(cur, t) for t in targets}
         for table in targets:
-            if not column_exists(cur, table, 'mess_id'):
+            if 'mess_id' not in cols[table]:
                 print(f"Adding mess_id to {table}...")
                 cur.execute(f"ALTER TABLE {table} ADD COLUMN mess_id INTEGER REFERENCES mess(id)")
             else:
@@ -68,11 +80,14 @@ def migrate():
             print(f"Backfilling {table}.mess_id where NULL...")
             cur.execute(f"UPDATE {table} SET mess_id = ? WHERE mess_id IS NULL", (default_id,))
 
-        conn.commit()
+        cur.execute("COMMIT")
         print("Migration complete.")
 
     except Exception as e:
-        conn.rollback()
+        try:
+            cur.execute("ROLLBACK")
+        except sqlite3.OperationalError:
+            pass  # nothing was begun yet
         print("Migration failed:", e)
     finally:
         conn.close()
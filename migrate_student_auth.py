@@ -9,42 +9,45 @@ from werkzeug.security import generate_password_hash
 def migrate_students():
     with app.app_context():
         print("Starting student table migration...")
-        
-        # Get all students
-        students = Student.query.all()
-        
-        if not students:
+
+        total = db.session.query(Student.id).count()
+        if not total:
             print("No students found in database.")
             return
-        
-        print(f"Found {len(students)} students. Updating records...")
-        
-        updated_count = 0
-        for student in students:
-            try:
-                # Add roll_no if missing (use id as fallback)
-                if not student.roll_no:
-                    student.roll_no = f"STU{str(student.id).zfill(4)}"
-                    print(f"  - Set roll_no for {student.name}: {student.roll_no}")
-                
-                # Add default password if missing
-                if not student.password_hash:
-                    # Default password is "password123"
-                    student.password_hash = generate_password_hash("password123")
-                    print(f"  - Set default password for {student.name} (password123)")
-                
-                # Add department if missing
-                if not hasattr(student, 'department') or not student.department:
-                    student.department = "General"
-                
-                updated_count += 1
-            except Exception as e:
-                print(f"  - Error updating {student.name}: {str(e)}")
-        
+
+        print(f"Found {total} students. Updating records...")
+
+        # Hash the shared bootstrap password once; the hash function is
+        # deliberately slow, so one call per student is pure waste. scrypt
+        # is pinned explicitly — C-backed and verifiable by the app's
+        # check_password_hash
+        default_hash = generate_password_hash("password123", method='scrypt')
+
+        # Three set-based UPDATEs instead of loading every Student object
+        # and letting the unit-of-work flush one statement per row; the
+        # database fills each column in a single table scan
+        missing = db.or_(Student.roll_no.is_(None), Student.roll_no == '')
+        roll_count = db.session.execute(
+            db.update(Student).where(missing)
+            .values(roll_no=db.func.printf('STU%04d', Student.id))
+        ).rowcount
+        pw_count = db.session.execute(
+            db.update(Student)
+            .where(db.or_(Student.password_hash.is_(None), Student.password_hash == ''))
+            .values(password_hash=default_hash)
+        ).rowcount
+        db.session.execute(
+            db.update(Student)
+            .where(db.or_(Student.department.is_(None), Student.department == ''))
+            .values(department='General')
+        )
+        print(f"  - Set roll_no for {roll_count} students")
+        print(f"  - Set default password for {pw_count} students (password123)")
+
         # Commit changes
         try:
             db.session.commit()
-            print(f"\n✅ Successfully updated {updated_count} students!")
+            print(f"\n✅ Successfully updated {total} students!")
             print("\nDefault credentials:")
             print("  - Roll Number: STU#### (where #### is the student ID)")
             print("  - Password: password123")
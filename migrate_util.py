@@ -0,0 +1,25 @@
+"""
+Shared connection helper for the sqlite migration scripts.
+Opens the database with the same pragmas the app itself runs under.
+"""
+import sqlite3
+
+
+def open_db(path):
+    """Open a sqlite database tuned for one-shot migration work.
+
+    isolation_level=None leaves transaction control to the scripts'
+    explicit BEGIN/COMMIT statements; the pragmas enable WAL with
+    relaxed syncs, memory-mapped reads and a larger page cache so the
+    schema probes and table scans run from the OS page cache instead of
+    per-page read() syscalls.
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.executescript(
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA mmap_size=268435456;"
+        "PRAGMA cache_size=-65536;"
+    )
+    return conn
@@ -146,22 +146,32 @@ function stopScanner() {
     });
 }
 
+function parseQrPayload(decodedText) {
+    // Compact signed format: "<student_id>.<signature>"
+    const tokenMatch = /^(\d+)\.[0-9a-f]+$/.exec(decodedText.trim());
+    if (tokenMatch) {
+        return { student_id: parseInt(tokenMatch[1], 10), token: decodedText.trim() };
+    }
+
+    // Legacy JSON payload from older printed QR codes
+    const data = JSON.parse(decodedText);
+    if (!data.student_id || !data.name) {
+        throw new Error('Invalid QR code data: Missing required fields');
+    }
+    return data;
+}
+
 function onScanSuccess(decodedText) {
     console.log('QR code scanned:', decodedText);
     try {
-        const data = JSON.parse(decodedText);
-        
-        // Validate required fields
-        if (!data.student_id || !data.name) {
-            throw new Error('Invalid QR code data: Missing required fields');
-        }
+        const data = parseQrPayload(decodedText);
 
         // Stop scanning and update UI
         stopScanner();
-        showAlert(`Successfully scanned QR code for ${data.name}`, 'success');
-        
+        showAlert(`Successfully scanned QR code for ${data.name || 'student #' + data.student_id}`, 'success');
+
         // Mark attendance
-        markAttendance(data.student_id);
+        markAttendance(data.student_id, data.token);
     } catch (error) {
         console.error('Error parsing QR code:', error);
         showAlert('Invalid QR code format. Please try scanning again.', 'danger');
@@ -177,7 +187,7 @@ function onScanError(error) {
     }
 }
 
-function markAttendance(studentId) {
+function markAttendance(studentId, token) {
     // Get current time to determine meal type
     const now = new Date();
     const hour = now.getHours();
@@ -203,7 +213,8 @@ function markAttendance(studentId) {
         body: JSON.stringify({
             student_id: studentId,
             meal_type: mealType,
-            method: 'qr'
+            method: 'qr',
+            token: token
         })
     })
     .then(response => {
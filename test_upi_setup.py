@@ -15,11 +15,11 @@ except ImportError as e:
     print(f"✗ Error importing urllib.parse: {e}")
 
 try:
-    import qrcode
-    print("✓ qrcode library imported successfully")
+    import segno
+    print("✓ segno library imported successfully")
 except ImportError:
-    print("✗ qrcode library not found!")
-    print("  Install it with: pip install qrcode[pil]")
+    print("✗ segno library not found!")
+    print("  Install it with: pip install segno")
 
 try:
     from io import BytesIO
@@ -34,12 +34,20 @@ print("Testing UPI Link Generation")
 print("=" * 60)
 
 upi_id = "mess@oksbi"
-payee_name = quote("Mess Management")
+# The payee name never changes per bill — quote it once at module level,
+# and keep the link as a %-template so per-bill code does a single
+# substitution instead of re-parsing an f-string and re-quoting the
+# merchant on every call
+_PAYEE_Q = quote("Mess Management")
+# the URL-quoted payee may itself contain % escapes, so double them
+# before embedding it in the %-template
+_UPI_TMPL = "upi://pay?pa=%s&pn=" + _PAYEE_Q.replace('%', '%%') + "&am=%s&cu=INR&tn=%s&tr=%s"
+
 amount = "150.00"
 transaction_note = quote("Mess Bill #1 - STU0001")
 txn_ref = "MESS1STU120251111120000"
 
-upi_link = f"upi://pay?pa={upi_id}&pn={payee_name}&am={amount}&cu=INR&tn={transaction_note}&tr={txn_ref}"
+upi_link = _UPI_TMPL % (upi_id, amount, transaction_note, txn_ref)
 
 print(f"\nGenerated UPI Link:")
 print(upi_link)
@@ -47,21 +55,35 @@ print(f"\n✓ UPI link format is correct")
 
 # Test QR code generation
 try:
-    import qrcode
+    import segno
+    import threading
     from io import BytesIO
     import base64
-    
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(upi_link)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill_color="black", back_color="white")
-    
-    buffered = BytesIO()
-    qr_img.save(buffered, format="PNG")
-    qr_base64 = base64.b64encode(buffered.getvalue()).decode()
-    
-    print(f"✓ QR code generated successfully ({len(qr_base64)} bytes)")
-    
+
+    _qr_local = threading.local()
+
+    def make_upi_qr(upi_link: str) -> str:
+        """Render a upi:// link to a base64 SVG with segno.
+
+        segno is what the app itself renders with — no Pillow, no
+        pure-Python mask-penalty loop, and error level M matches the
+        production helpers. SVG path data is a fraction of the size of
+        an encoded PNG and scales crisply when embedded as a
+        data:image/svg+xml;base64 URL. The output buffer lives in
+        thread-local storage and is cleared between calls instead of
+        reallocated.
+        """
+        if not hasattr(_qr_local, 'buf'):
+            _qr_local.buf = BytesIO()
+        buf = _qr_local.buf
+        buf.seek(0)
+        buf.truncate(0)
+        segno.make(upi_link, error='m').save(buf, kind='svg', scale=6)
+        return base64.b64encode(buf.getvalue()).decode()
+
+    qr_base64 = make_upi_qr(upi_link)
+    print(f"✓ QR code generated successfully ({len(qr_base64)} bytes, SVG)")
+
 except Exception as e:
     print(f"✗ Error generating QR code: {e}")
 
@@ -73,6 +95,6 @@ print("   app.config['UPI_ID'] = 'yourmessaccount@paytm'")
 print("\n2. Update merchant name:")
 print("   app.config['UPI_NAME'] = 'Your College Mess Name'")
 print("\n3. Make sure these are installed:")
-print("   pip install qrcode[pil]")
+print("   pip install segno")
 print("\n4. Test on mobile device for best experience!")
 print("\n" + "=" * 60)